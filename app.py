@@ -1,82 +1,134 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import numpy as np
 
+from data_prep import data_mtime, read_data
+
 # ================= CONFIG =================
 st.set_page_config(
     page_title="Authentication Resilience Intelligence (ARI)",
     layout="wide"
 )
 
-DATA_PATH = "data_processed/ARI_final_district_final.csv"
-
 # ================= LOAD DATA =================
-@st.cache_data
+@st.cache_data(persist="disk", show_spinner=False)
 def load_data():
-    df = pd.read_csv(DATA_PATH)
-
-    if "MonthDate" in df.columns:
-        df["MonthDate"] = pd.to_datetime(df["MonthDate"], errors="coerce")
-
-    for col in ["ARI", "BUR", "BUD", "AWF", "MAF_raw"]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-
-    for col in ["state", "district", "Risk", "MonthName"]:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.strip()
-
-    return df.dropna(subset=["ARI", "state", "district"])
+    """
+    Returns (mtime, frame). Takes no arguments so the disk cache only ever
+    holds one pickle; it is cleared below when the data files change.
+    """
+    return data_mtime(), read_data()
 
-df = load_data()
+mtime, df = load_data()
+if mtime != data_mtime():
+    load_data.clear()
+    mtime, df = load_data()
 
 # ================= SIDEBAR FILTERS =================
 st.sidebar.title("Filters")
 
-states = ["All"] + sorted(df["state"].unique())
-risks = ["All"] + sorted(df["Risk"].unique())
+states = ["All"] + df["state"].cat.categories.tolist()
+risks = ["All"] + df["Risk"].cat.categories.tolist()
 
 sel_state = st.sidebar.selectbox("State", states)
 sel_risk = st.sidebar.selectbox("Risk Category", risks)
 district_search = st.sidebar.text_input("District Search")
 
-df_f = df.copy()
-if sel_state != "All":
-    df_f = df_f[df_f["state"] == sel_state]
-if sel_risk != "All":
-    df_f = df_f[df_f["Risk"] == sel_risk]
-if district_search.strip():
-    df_f = df_f[df_f["district"].str.contains(district_search, case=False, na=False)]
+@st.cache_data(max_entries=64)
+def filter_df(mtime, state, risk, search):
+    _, d = load_data()
+    mask = np.ones(len(d), dtype=bool)
+    if state != "All":
+        mask &= (d["state"] == state).values
+    if risk != "All":
+        mask &= (d["Risk"] == risk).values
+    if search.strip():
+        mask &= d["district"].str.contains(search, case=False, na=False, regex=False).values
+    return d.loc[mask]
+
+df_f = filter_df(mtime, sel_state, sel_risk, district_search)
 
 # ================= HELPERS =================
+RISK_COLORS = {
+    "High": "#c0392b",
+    "Medium": "#f39c12",
+    "Low": "#27ae60",
+}
+
+@st.cache_data(max_entries=64)
+def risk_pie_fig(mtime, state, risk, search):
+    counts = filter_df(mtime, state, risk, search)["Risk"].value_counts()
+    counts = counts[counts > 0]
+    return go.Figure(
+        go.Pie(
+            labels=counts.index.tolist(),
+            values=counts.values,
+            hole=0.55,
+            marker=dict(colors=[RISK_COLORS.get(r) for r in counts.index]),
+        )
+    )
+
+@st.cache_data(max_entries=64)
+def scatter_fig(mtime, state, risk, search, x, y):
+    """
+    WebGL scatter of y against x, one trace per risk category.
+    """
+    d = filter_df(mtime, state, risk, search)
+    fig = go.Figure()
+    for r, grp in d.groupby("Risk", observed=True):
+        fig.add_trace(
+            go.Scattergl(
+                x=grp[x].values,
+                y=grp[y].values,
+                mode="markers",
+                name=r,
+                marker=dict(color=RISK_COLORS.get(r)),
+            )
+        )
+    fig.update_layout(xaxis_title=x, yaxis_title=y, legend_title_text="Risk")
+    return fig
+
 def show_kpis(d):
+    vc = d["Risk"].value_counts()
+    avg = d["ARI"].mean() if len(d) else 0.0
+
     c1, c2, c3, c4 = st.columns(4)
-    c1.metric("Average ARI", round(d["ARI"].mean(), 3))
-    c2.metric("High Risk", int((d["Risk"] == "High").sum()))
-    c3.metric("Medium Risk", int((d["Risk"] == "Medium").sum()))
-    c4.metric("Low Risk", int((d["Risk"] == "Low").sum()))
-
-def explain_district(row):
-    reasons = []
-    if row["BUR"] > df["BUR"].median():
-        reasons.append("outdated biometrics")
-    if row["BUD"] < df["BUD"].median():
-        reasons.append("low update density")
-    if row["AWF"] > df["AWF"].median():
-        reasons.append("high authentication load")
-    return ", ".join(reasons) if reasons else "no dominant driver"
-
-def compute_early_warning(d):
+    c1.metric("Average ARI", round(avg, 3))
+    c2.metric("High Risk", int(vc.get("High", 0)))
+    c3.metric("Medium Risk", int(vc.get("Medium", 0)))
+    c4.metric("Low Risk", int(vc.get("Low", 0)))
+
+def explain_districts(rows, ref):
+    """
+    Primary driver per row, judged against the medians of ref.
+    """
+    b_med, d_med, a_med = ref[["BUR", "BUD", "AWF"]].median()
+    flags = zip(
+        (rows["BUR"] > b_med).values,
+        (rows["BUD"] < d_med).values,
+        (rows["AWF"] > a_med).values,
+    )
+    labels = ("outdated biometrics", "low update density", "high authentication load")
+    return [
+        ", ".join(label for label, hit in zip(labels, f) if hit) or "no dominant driver"
+        for f in flags
+    ]
+
+@st.cache_data(max_entries=2)
+def compute_early_warning(mtime):
+    """
+    Sudden ARI drops and Medium -> High transitions from one sorted,
+    grouped pass over the full dataset.
+    """
+    _, d = load_data()
     d = d.sort_values(["state", "district", "MonthDate"]).copy()
-    d["ARI_prev"] = d.groupby(["state", "district"])["ARI"].shift(1)
+    g = d.groupby(["state", "district"], sort=False, observed=True)
+    d["ARI_prev"] = g["ARI"].shift(1)
+    d["Risk_prev"] = g["Risk"].shift(1)
+
     d["ARI_change_pct"] = (d["ARI"] - d["ARI_prev"]) / d["ARI_prev"]
     d["Early_Warning"] = d["ARI_change_pct"] < -0.15
-    return d
-
-def risk_transition_flag(d):
-    d = d.sort_values(["state", "district", "MonthDate"]).copy()
-    d["Risk_prev"] = d.groupby(["state", "district"])["Risk"].shift(1)
     d["Transition"] = (d["Risk_prev"] == "Medium") & (d["Risk"] == "High")
     return d
 
@@ -89,18 +141,17 @@ def compute_priority_score(d):
     - Population proxy via AWF
     """
     s = d.copy()
+    cols = ["ARI", "BUR", "BUD", "AWF"]
 
-    s["ARI_norm"] = 1 - (s["ARI"] - s["ARI"].min()) / (s["ARI"].max() - s["ARI"].min())
-    s["BUR_norm"] = (s["BUR"] - s["BUR"].min()) / (s["BUR"].max() - s["BUR"].min())
-    s["BUD_norm"] = 1 - (s["BUD"] - s["BUD"].min()) / (s["BUD"].max() - s["BUD"].min())
-    s["AWF_norm"] = (s["AWF"] - s["AWF"].min()) / (s["AWF"].max() - s["AWF"].min())
+    stats = s[cols].agg(["min", "max"]).to_numpy()
+    mn, mx = stats[0], stats[1]
+    rng = np.where(mx - mn == 0, 1, mx - mn)
 
-    s["Priority_Score"] = (
-        0.4 * s["ARI_norm"]
-        + 0.25 * s["BUR_norm"]
-        + 0.2 * s["BUD_norm"]
-        + 0.15 * s["AWF_norm"]
-    )
+    norm = (s[cols].to_numpy(dtype=float) - mn) / rng
+    norm[:, 0] = 1 - norm[:, 0]
+    norm[:, 2] = 1 - norm[:, 2]
+
+    s["Priority_Score"] = norm @ np.array([0.4, 0.25, 0.2, 0.15])
 
     return s.sort_values("Priority_Score", ascending=False)
 
@@ -109,7 +160,7 @@ def simple_forecast(d):
     Safe forecast: rolling trend extrapolation
     """
     d = d.sort_values(["state", "district", "MonthDate"]).copy()
-    d["ARI_trend"] = d.groupby(["state", "district"])["ARI"].diff()
+    d["ARI_trend"] = d.groupby(["state", "district"], sort=False, observed=True)["ARI"].diff()
     d["Forecast_ARI_Next"] = d["ARI"] + d["ARI_trend"].fillna(0)
     return d
 
@@ -147,26 +198,14 @@ elif page == "National Overview":
     st.title("National Risk Overview")
     show_kpis(df_f)
 
-    risk_counts = df_f["Risk"].value_counts().reset_index()
-    risk_counts.columns = ["Risk", "Count"]
-
-    fig = px.pie(
-        risk_counts,
-        names="Risk",
-        values="Count",
-        hole=0.55,
-        color="Risk",
-        color_discrete_map={
-            "High": "#c0392b",
-            "Medium": "#f39c12",
-            "Low": "#27ae60",
-        },
-    )
-    st.plotly_chart(fig, width="stretch")
+    if len(df_f) == 0:
+        st.info("No districts match the current filters.")
+    else:
+        st.plotly_chart(risk_pie_fig(mtime, sel_state, sel_risk, district_search), width="stretch")
 
     st.subheader("Lowest ARI Districts")
     st.dataframe(
-        df_f.sort_values("ARI").head(20)[
+        df_f.nsmallest(20, "ARI")[
             ["state", "district", "ARI", "Risk", "BUR", "BUD"]
         ],
         width="stretch",
@@ -176,7 +215,7 @@ elif page == "National Overview":
 elif page == "High Risk Ranking":
     st.title("High Risk Ranking")
 
-    top = df_f.sort_values("ARI").head(15)
+    top = df_f.nsmallest(15, "ARI")
     fig = px.bar(
         top,
         x="ARI",
@@ -192,20 +231,23 @@ elif page == "High Risk Ranking":
 elif page == "Explainability":
     st.title("Explainability")
 
-    col1, col2 = st.columns(2)
-    with col1:
-        st.plotly_chart(
-            px.scatter(df_f, x="BUR", y="ARI", color="Risk"),
-            width="stretch",
-        )
-    with col2:
-        st.plotly_chart(
-            px.scatter(df_f, x="BUD", y="ARI", color="Risk"),
-            width="stretch",
-        )
-
-    worst = df_f.sort_values("ARI").head(15).copy()
-    worst["Primary Driver"] = worst.apply(explain_district, axis=1)
+    if len(df_f) == 0:
+        st.info("No districts match the current filters.")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(
+                scatter_fig(mtime, sel_state, sel_risk, district_search, "BUR", "ARI"),
+                width="stretch",
+            )
+        with col2:
+            st.plotly_chart(
+                scatter_fig(mtime, sel_state, sel_risk, district_search, "BUD", "ARI"),
+                width="stretch",
+            )
+
+    worst = df_f.nsmallest(15, "ARI").copy()
+    worst["Primary Driver"] = explain_districts(worst, df)
 
     st.dataframe(
         worst[
@@ -218,7 +260,7 @@ elif page == "Explainability":
 elif page == "Early Warning System":
     st.title("Early Warning Monitor")
 
-    ew = compute_early_warning(df)
+    ew = compute_early_warning(mtime)
     sudden = ew[ew["Early_Warning"] == True]
 
     st.subheader("Sudden ARI Degradation")
@@ -232,10 +274,9 @@ elif page == "Early Warning System":
             width="stretch",
         )
 
-    trans = risk_transition_flag(df)
     st.subheader("Medium to High Risk Transitions")
     st.dataframe(
-        trans[trans["Transition"] == True][
+        ew[ew["Transition"] == True][
             ["state", "district", "MonthName", "ARI", "Risk"]
         ],
         width="stretch",
@@ -271,14 +312,15 @@ elif page == "Action Planner":
     scored = compute_priority_score(df_f)
     forecasted = simple_forecast(scored)
 
-    forecasted["Recommended Action"] = np.where(
-        forecasted["Forecast_ARI_Next"] < forecasted["ARI"],
+    top = forecasted.head(25).copy()
+    top["Recommended Action"] = np.where(
+        top["Forecast_ARI_Next"].values < top["ARI"].values,
         "Immediate biometric update drive",
         "Monitor and optimize throughput",
     )
 
     st.dataframe(
-        forecasted.head(25)[
+        top[
             ["state", "district", "ARI", "Forecast_ARI_Next", "Risk", "Recommended Action"]
         ],
         width="stretch",
@@ -0,0 +1,60 @@
+import os
+
+import pandas as pd
+
+DATA_PATH = "data_processed/ARI_final_district_final.csv"
+DATA_PATH_PARQUET = "data_processed/ARI_final_district_final.parquet"
+
+# ================= CLEANING =================
+def clean_data(df):
+    if "MonthDate" in df.columns:
+        df["MonthDate"] = pd.to_datetime(df["MonthDate"], errors="coerce")
+
+    for col in ["ARI", "BUR", "BUD", "AWF", "MAF_raw"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    # Drop before the category cast so no category is left without rows;
+    # state/district are coerced to str below and can never be NaN
+    df = df[df["ARI"].notna()].copy()
+
+    for col in ["state", "district", "Risk", "MonthName"]:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip().astype("category")
+
+    return df
+
+def data_mtime():
+    """
+    Newest mtime across the data files, used as a cache key so replacing
+    either file invalidates cached frames.
+    """
+    paths = [p for p in (DATA_PATH, DATA_PATH_PARQUET) if os.path.exists(p)]
+    return max(os.path.getmtime(p) for p in paths)
+
+def read_data():
+    """
+    Prefer the pre-typed Parquet file unless the CSV is newer; otherwise
+    parse the CSV and refresh the Parquet file from it.
+    """
+    if os.path.exists(DATA_PATH_PARQUET) and (
+        not os.path.exists(DATA_PATH)
+        or os.path.getmtime(DATA_PATH_PARQUET) >= os.path.getmtime(DATA_PATH)
+    ):
+        return pd.read_parquet(DATA_PATH_PARQUET, engine="pyarrow")
+
+    df = clean_data(pd.read_csv(DATA_PATH))
+    try:
+        write_parquet(df)
+    except OSError:
+        pass  # read-only checkout: keep serving from the CSV
+    return df
+
+def write_parquet(df):
+    df.to_parquet(DATA_PATH_PARQUET, engine="pyarrow", index=False)
+
+# ================= ONE-TIME CONVERSION =================
+if __name__ == "__main__":
+    out = clean_data(pd.read_csv(DATA_PATH))
+    write_parquet(out)
+    print(f"Wrote {len(out)} rows to {DATA_PATH_PARQUET}")